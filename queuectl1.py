@@ -28,20 +28,27 @@ import sqlite3
 import threading
 import time
 import json
+import argparse
 import uuid
+import random
 import subprocess
-from datetime import datetime, timedelta
-from typing import Optional, Dict
+import os
+import selectors
+import shlex
+import shutil
+import tempfile
+import queue
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Dict, List
 
 DB_PATH = "queuectl.db"
+PAGE_SIZE = 50
 
-
-
-def init_db():
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    c = conn.cursor()
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS jobs (
+# jobs is keyed by id alone, so it is stored WITHOUT ROWID: one B-tree instead of
+# a rowid table plus a separate primary-key index
+JOBS_TABLE = """(
         id TEXT PRIMARY KEY,
         command TEXT NOT NULL,
         state TEXT NOT NULL,
@@ -49,9 +56,65 @@ def init_db():
         max_retries INTEGER NOT NULL,
         created_at TEXT NOT NULL,
         updated_at TEXT NOT NULL,
-        next_run_at TEXT
-    )
-    """)
+        created_at_ms INTEGER NOT NULL,
+        next_run_at_ms INTEGER,
+        priority INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID"""
+JOBS_COLUMNS = "id, command, state, attempts, max_retries, created_at, updated_at, created_at_ms, next_run_at_ms, priority"
+CHECKPOINT_COMMITS = 1000
+CHECKPOINT_SECONDS = 60
+
+
+
+def open_connection(read_only: bool = False):
+    # isolation_level=None: no implicit BEGINs, the writer issues its own transactions
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256, isolation_level=None)
+    c = conn.cursor()
+    # WAL lets readers run alongside the writer; NORMAL sync is safe under WAL
+    c.execute("PRAGMA journal_mode=WAL")
+    c.execute("PRAGMA synchronous=NORMAL")
+    c.execute("PRAGMA busy_timeout=5000")
+    c.execute("PRAGMA temp_store=MEMORY")
+    c.execute("PRAGMA cache_size=-20000")
+    if read_only:
+        c.execute("PRAGMA query_only=1")
+    return conn
+
+
+def init_db():
+    conn = open_connection()
+    c = conn.cursor()
+    c.execute("PRAGMA wal_autocheckpoint=1000")
+    c.execute("BEGIN IMMEDIATE")
+    c.execute("CREATE TABLE IF NOT EXISTS jobs " + JOBS_TABLE)
+    c.execute("PRAGMA table_info(jobs)")
+    job_columns = {row[1] for row in c.fetchall()}
+    if 'created_at_ms' not in job_columns:
+        # databases from before scheduling moved to epoch-ms integers: add and backfill
+        c.execute("ALTER TABLE jobs ADD COLUMN created_at_ms INTEGER NOT NULL DEFAULT 0")
+        c.execute("ALTER TABLE jobs ADD COLUMN next_run_at_ms INTEGER")
+        c.execute("UPDATE jobs SET created_at_ms = CAST((julianday(replace(created_at, 'Z', '')) - 2440587.5) * 86400000 AS INTEGER), "
+                  "next_run_at_ms = CAST((julianday(replace(next_run_at, 'Z', '')) - 2440587.5) * 86400000 AS INTEGER)")
+        c.execute("DROP INDEX IF EXISTS idx_jobs_state_next")
+    if 'priority' not in job_columns:
+        c.execute("ALTER TABLE jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+    c.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'jobs'")
+    if 'WITHOUT ROWID' not in c.fetchone()[0].upper():
+        # rebuild older rowid tables (drops their indexes and the unused next_run_at column)
+        c.execute("CREATE TABLE jobs_new " + JOBS_TABLE)
+        c.execute(f"INSERT INTO jobs_new({JOBS_COLUMNS}) SELECT {JOBS_COLUMNS} FROM jobs")
+        c.execute("DROP TABLE jobs")
+        c.execute("ALTER TABLE jobs_new RENAME TO jobs")
+    # partial indexes over the pending tail only, which is all the scheduler reads;
+    # dispatch order is highest priority first, FIFO within a priority, and the
+    # index also carries every column the claim filters on (plus id, the key) so it
+    # covers the claim's scan. The scheduler queries name these with INDEXED BY:
+    # without ANALYZE stats the planner prefers idx_jobs_state_created instead
+    c.execute("CREATE INDEX IF NOT EXISTS idx_jobs_pending ON jobs(priority DESC, created_at_ms, next_run_at_ms, state) WHERE state = 'pending'")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_jobs_pending_next ON jobs(next_run_at_ms) WHERE state = 'pending'")
+    # keyset pagination for the Jobs list, with and without a state filter
+    c.execute("CREATE INDEX IF NOT EXISTS idx_jobs_state_created ON jobs(state, created_at_ms, id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs(created_at_ms, id)")
     c.execute("""
     CREATE TABLE IF NOT EXISTS dlq (
         id TEXT PRIMARY KEY,
@@ -59,9 +122,14 @@ def init_db():
         attempts INTEGER NOT NULL,
         max_retries INTEGER NOT NULL,
         failed_at TEXT NOT NULL,
-        last_error TEXT
+        last_error TEXT,
+        priority INTEGER NOT NULL DEFAULT 0
     )
     """)
+    c.execute("PRAGMA table_info(dlq)")
+    if 'priority' not in {row[1] for row in c.fetchall()}:
+        c.execute("ALTER TABLE dlq ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_dlq_failed ON dlq(failed_at, id)")
     c.execute("""
     CREATE TABLE IF NOT EXISTS config (
         key TEXT PRIMARY KEY,
@@ -71,11 +139,120 @@ def init_db():
     
     c.execute("INSERT OR IGNORE INTO config(key, value) VALUES ('max_retries', '3')")
     c.execute("INSERT OR IGNORE INTO config(key, value) VALUES ('base_backoff_seconds', '2')")
-    conn.commit()
+    c.execute("COMMIT")
+    c.execute("SELECT key, value FROM config")
+    config_cache.load(c.fetchall())
     return conn
 
-conn = init_db()
-db_lock = threading.Lock()
+
+class ConfigCache:
+    """In-process copy of the config table, kept current by set_config.
+
+    Numeric values are also stored pre-cast so hot paths skip int() parsing.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._ints = {}
+        self._lock = threading.Lock()
+
+    def load(self, rows):
+        for key, value in rows:
+            self.set(key, value)
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._values[key] = value
+            try:
+                self._ints[key] = int(value)
+            except ValueError:
+                self._ints.pop(key, None)
+
+    def get(self, key: str) -> str:
+        return self._values.get(key, "")
+
+    def get_int(self, key: str, default: int) -> int:
+        return self._ints.get(key, default)
+
+class ConnectionPool:
+    """One writer connection plus a LIFO stack of read-only connections.
+
+    Readers are opened lazily, so the pool grows to the number of threads
+    that actually read concurrently (workers + the Streamlit script thread).
+    LIFO hands back the most recently used connection, whose page cache is hot.
+    Each connection keeps a single cursor that is reused for every call.
+    """
+
+    def __init__(self, writer_conn):
+        self.writer_conn = writer_conn
+        self._writer_cursor = writer_conn.cursor()
+        self._commits_since_checkpoint = 0
+        self._last_checkpoint = time.monotonic()
+        self._readers = queue.LifoQueue()
+
+    def acquire_reader(self):
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            return open_connection(read_only=True).cursor()
+
+    def release_reader(self, reader):
+        self._readers.put(reader)
+
+    @contextmanager
+    def reader(self):
+        c = self.acquire_reader()
+        try:
+            yield c
+        finally:
+            self.release_reader(c)
+
+    @contextmanager
+    def writer(self):
+        # SQLite serializes access itself; the lock only keeps this process's
+        # threads from interleaving statements inside one writer transaction
+        with writer_lock:
+            c = self._writer_cursor
+            c.execute("BEGIN IMMEDIATE")
+            try:
+                yield c
+                c.execute("COMMIT")
+            except Exception:
+                c.execute("ROLLBACK")
+                raise
+            self._maybe_checkpoint()
+
+    def _maybe_checkpoint(self):
+        # autocheckpoint is passive and never shrinks the file; truncate the WAL
+        # ourselves every CHECKPOINT_COMMITS commits or CHECKPOINT_SECONDS
+        self._commits_since_checkpoint += 1
+        now = time.monotonic()
+        if (self._commits_since_checkpoint < CHECKPOINT_COMMITS
+                and now - self._last_checkpoint < CHECKPOINT_SECONDS):
+            return
+        self._writer_cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._writer_cursor.fetchall()
+        self._commits_since_checkpoint = 0
+        self._last_checkpoint = now
+
+
+@st.cache_resource
+def get_config_cache():
+    # shared across reruns so set_config reaches workers started in earlier runs
+    return ConfigCache()
+
+
+@st.cache_resource
+def get_job_available():
+    # Streamlit re-executes this script on every rerun; caching keeps one
+    # condition shared by workers started in earlier runs and new enqueues
+    return threading.Condition()
+
+
+writer_lock = threading.Lock()
+config_cache = get_config_cache()
+pool = ConnectionPool(init_db())
+job_available = get_job_available()
 
 
 
@@ -83,6 +260,10 @@ def now_iso():
     return datetime.utcnow().isoformat() + "Z"
 
 
+def now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
 def parse_iso(s: Optional[str]) -> Optional[datetime]:
     if not s:
         return None
@@ -93,260 +274,440 @@ def parse_iso(s: Optional[str]) -> Optional[datetime]:
 
 
 def get_config(key: str) -> str:
-    with db_lock:
-        c = conn.cursor()
-        c.execute("SELECT value FROM config WHERE key = ?", (key,))
-        row = c.fetchone()
-        return row[0] if row else ""
+    return config_cache.get(key)
+
+
+def get_config_int(key: str, default: int) -> int:
+    return config_cache.get_int(key, default)
 
 
 def set_config(key: str, value: str):
-    with db_lock:
-        c = conn.cursor()
+    with pool.writer() as c:
         c.execute("REPLACE INTO config(key, value) VALUES (?, ?)", (key, value))
-        conn.commit()
+    config_cache.set(key, value)
 
 
 
 def enqueue_job(job: Dict):
-    # job must contain id, command. Optional: max_retries
+    # job must contain id, command. Optional: max_retries, priority (higher runs first)
     jid = job.get('id') or str(uuid.uuid4())
     command = job.get('command')
     if not command:
         raise ValueError('Job must have a command')
-    max_retries = int(job.get('max_retries', get_config('max_retries') or 3))
+    max_retries = int(job.get('max_retries', get_config_int('max_retries', 3)))
+    priority = int(job.get('priority', 0))
     created = now_iso()
-    with db_lock:
-        c = conn.cursor()
-        c.execute("INSERT OR REPLACE INTO jobs(id, command, state, attempts, max_retries, created_at, updated_at, next_run_at) VALUES (?, ?, 'pending', 0, ?, ?, ?, NULL)",
-                  (jid, command, max_retries, created, created))
-        conn.commit()
+    with pool.writer() as c:
+        c.execute("INSERT OR REPLACE INTO jobs(id, command, state, attempts, max_retries, created_at, updated_at, created_at_ms, next_run_at_ms, priority) VALUES (?, ?, 'pending', 0, ?, ?, ?, ?, NULL, ?)",
+                  (jid, command, max_retries, created, created, now_ms(), priority))
+    with job_available:
+        job_available.notify()
     return jid
 
 
-def list_jobs(state: Optional[str] = None):
-    with db_lock:
-        c = conn.cursor()
-        if state:
-            c.execute("SELECT id, command, state, attempts, max_retries, created_at, updated_at, next_run_at FROM jobs WHERE state = ? ORDER BY created_at", (state,))
-        else:
-            c.execute("SELECT id, command, state, attempts, max_retries, created_at, updated_at, next_run_at FROM jobs ORDER BY created_at")
+def list_jobs(state: Optional[str] = None, limit: Optional[int] = 50, after: Optional[tuple] = None):
+    # keyset pagination: `after` is the (created_at_ms, id) of the last row of the previous page
+    sql = "SELECT id, command, state, attempts, max_retries, created_at, updated_at, created_at_ms, next_run_at_ms, priority FROM jobs"
+    where, params = [], []
+    if state:
+        where.append("state = ?")
+        params.append(state)
+    if after:
+        where.append("(created_at_ms, id) > (?, ?)")
+        params.extend(after)
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY created_at_ms, id"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    with pool.reader() as c:
+        c.execute(sql, params)
         rows = c.fetchall()
-    keys = ['id','command','state','attempts','max_retries','created_at','updated_at','next_run_at']
+    keys = ['id','command','state','attempts','max_retries','created_at','updated_at','created_at_ms','next_run_at_ms','priority']
     return [dict(zip(keys, r)) for r in rows]
 
 
+def job_state_counts() -> Dict[str, int]:
+    with pool.reader() as c:
+        c.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state")
+        return dict(c.fetchall())
+
+
 def get_job(jid: str):
-    with db_lock:
-        c = conn.cursor()
-        c.execute("SELECT id, command, state, attempts, max_retries, created_at, updated_at, next_run_at FROM jobs WHERE id = ?", (jid,))
+    with pool.reader() as c:
+        c.execute("SELECT id, command, state, attempts, max_retries, created_at, updated_at, created_at_ms, next_run_at_ms, priority FROM jobs WHERE id = ?", (jid,))
         row = c.fetchone()
     if not row:
         return None
-    keys = ['id','command','state','attempts','max_retries','created_at','updated_at','next_run_at']
+    keys = ['id','command','state','attempts','max_retries','created_at','updated_at','created_at_ms','next_run_at_ms','priority']
     return dict(zip(keys, row))
 
 
-def update_job_state(jid: str, state: str, attempts: Optional[int] = None, next_run_at: Optional[str] = None):
-    with db_lock:
-        c = conn.cursor()
-        if attempts is None and next_run_at is None:
-            c.execute("UPDATE jobs SET state = ?, updated_at = ? WHERE id = ?", (state, now_iso(), jid))
-        elif attempts is None:
-            c.execute("UPDATE jobs SET state = ?, next_run_at = ?, updated_at = ? WHERE id = ?", (state, next_run_at, now_iso(), jid))
-        elif next_run_at is None:
-            c.execute("UPDATE jobs SET state = ?, attempts = ?, updated_at = ? WHERE id = ?", (state, attempts, now_iso(), jid))
-        else:
-            c.execute("UPDATE jobs SET state = ?, attempts = ?, next_run_at = ?, updated_at = ? WHERE id = ?", (state, attempts, next_run_at, now_iso(), jid))
-        conn.commit()
+def retry_job_now(jid: str):
+    with pool.writer() as c:
+        c.execute("UPDATE jobs SET state = 'pending', attempts = 0, next_run_at_ms = NULL, updated_at = ? WHERE id = ?", (now_iso(), jid))
+    with job_available:
+        job_available.notify()
 
 
 def move_to_dlq(jid: str, last_error: str = ''):
-    job = get_job(jid)
-    if not job:
-        return
-    with db_lock:
-        c = conn.cursor()
-        c.execute("INSERT OR REPLACE INTO dlq(id, command, attempts, max_retries, failed_at, last_error) VALUES (?, ?, ?, ?, ?, ?)",
-                  (job['id'], job['command'], job['attempts'], job['max_retries'], now_iso(), last_error))
-        c.execute("DELETE FROM jobs WHERE id = ?", (jid,))
-        conn.commit()
+    finish_jobs([], [], [(now_iso(), last_error, jid)])
 
 
 def retry_dlq(jid: str):
-    with db_lock:
-        c = conn.cursor()
-        c.execute("SELECT id, command, attempts, max_retries FROM dlq WHERE id = ?", (jid,))
+    with pool.writer() as c:
+        c.execute("SELECT id, command, attempts, max_retries, priority FROM dlq WHERE id = ?", (jid,))
         row = c.fetchone()
         if not row:
             raise ValueError('DLQ job not found')
-        jid, command, attempts, max_retries = row
+        jid, command, attempts, max_retries, priority = row
         # Put back to jobs with attempts so retry will continue
-        c.execute("INSERT OR REPLACE INTO jobs(id, command, state, attempts, max_retries, created_at, updated_at, next_run_at) VALUES (?, ?, 'pending', ?, ?, ?, ?, NULL)",
-                  (jid, command, attempts, max_retries, now_iso(), now_iso()))
+        c.execute("INSERT OR REPLACE INTO jobs(id, command, state, attempts, max_retries, created_at, updated_at, created_at_ms, next_run_at_ms, priority) VALUES (?, ?, 'pending', ?, ?, ?, ?, ?, NULL, ?)",
+                  (jid, command, attempts, max_retries, now_iso(), now_iso(), now_ms(), priority))
         c.execute("DELETE FROM dlq WHERE id = ?", (jid,))
-        conn.commit()
-
-
-def list_dlq():
-    with db_lock:
-        c = conn.cursor()
-        c.execute("SELECT id, command, attempts, max_retries, failed_at, last_error FROM dlq ORDER BY failed_at")
+    with job_available:
+        job_available.notify()
+
+
+def list_dlq(limit: Optional[int] = 50, after: Optional[tuple] = None):
+    # keyset pagination: `after` is the (failed_at, id) of the last row of the previous page
+    sql = "SELECT id, command, attempts, max_retries, failed_at, last_error, priority FROM dlq"
+    params = []
+    if after:
+        sql += " WHERE (failed_at, id) > (?, ?)"
+        params.extend(after)
+    sql += " ORDER BY failed_at, id"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    with pool.reader() as c:
+        c.execute(sql, params)
         rows = c.fetchall()
-    keys = ['id','command','attempts','max_retries','failed_at','last_error']
+    keys = ['id','command','attempts','max_retries','failed_at','last_error','priority']
     return [dict(zip(keys, r)) for r in rows]
 
 
+def dlq_count() -> int:
+    with pool.reader() as c:
+        c.execute("SELECT COUNT(*) FROM dlq")
+        return c.fetchone()[0]
+
+
+
+class CliArgumentParser(argparse.ArgumentParser):
+    """ArgumentParser that raises ValueError (shown in the UI) instead of exiting."""
+
+    def error(self, message):
+        raise ValueError(message)
+
+
+def positive_int(value: str) -> int:
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f'must be at least 1, got {n}')
+    return n
+
+
+# flag parsers are built once at import, not per command
+WORKER_START_ARGS = CliArgumentParser(prog='queuectl worker start', add_help=False)
+WORKER_START_ARGS.add_argument('--count', type=positive_int, default=1)
+WORKER_START_ARGS.add_argument('--concurrency', type=positive_int, default=1)
+LIST_ARGS = CliArgumentParser(prog='queuectl list', add_help=False)
+LIST_ARGS.add_argument('--state')
+
+
+# every handler gets the raw text after the action word; enqueue needs it
+# untokenized because it is JSON, the rest shlex.split it themselves
+
+def cmd_enqueue(args: str) -> str:
+    job = json.loads(args)
+    jid = enqueue_job(job)
+    return f'enqueued {jid}'
+
+
+def cmd_worker(args: str) -> str:
+    parts = shlex.split(args)
+    if not parts:
+        raise ValueError('worker requires start/stop')
+    sub = parts[0]
+    if sub == 'start':
+        opts = WORKER_START_ARGS.parse_args(parts[1:])
+        for i in range(opts.count):
+            ev = threading.Event()
+            w = Worker(stop_event=ev, name=f'worker-{len(st.session_state.workers)+1}', concurrency=opts.concurrency)
+            st.session_state.worker_events.append(ev)
+            st.session_state.workers.append(w)
+            w.start()
+        return f'started {opts.count} worker(s)'
+    if sub == 'stop':
+        for ev in st.session_state.worker_events:
+            ev.set()
+        with job_available:
+            job_available.notify_all()
+        st.session_state.worker_events = []
+        st.session_state.workers = []
+        return 'stop signal sent to workers'
+    raise ValueError('unknown worker subcommand')
+
+
+def cmd_status(args: str) -> str:
+    s = { 'pending':0, 'running':0, 'completed':0 }
+    s.update(job_state_counts())
+    return json.dumps(s)
+
+
+def cmd_list(args: str) -> str:
+    opts = LIST_ARGS.parse_args(shlex.split(args))
+    jobs = list_jobs(state=opts.state, limit=None)
+    return json.dumps(jobs, indent=2)
+
+
+def cmd_dlq(args: str) -> str:
+    parts = shlex.split(args)
+    if not parts:
+        raise ValueError('dlq requires list/retry')
+    sub = parts[0]
+    if sub == 'list':
+        return json.dumps(list_dlq(limit=None), indent=2)
+    if sub == 'retry':
+        if len(parts) < 2:
+            raise ValueError('provide job id')
+        jid = parts[1]
+        retry_dlq(jid)
+        return f'retried {jid}'
+    raise ValueError('unknown dlq subcommand')
+
+
+def cmd_config(args: str) -> str:
+    parts = shlex.split(args)
+    if not parts:
+        raise ValueError('config requires set/get')
+    sub = parts[0]
+    if sub == 'set':
+        if len(parts) < 3:
+            raise ValueError('usage: queuectl config set key value')
+        key = parts[1]
+        value = parts[2]
+        set_config(key, value)
+        return f'set {key} = {value}'
+    if sub == 'get':
+        if len(parts) < 2:
+            raise ValueError('usage: queuectl config get key')
+        key = parts[1]
+        return get_config(key)
+    raise ValueError('unknown command')
+
+
+CLI_DISPATCH = {
+    'enqueue': cmd_enqueue,
+    'worker': cmd_worker,
+    'status': cmd_status,
+    'list': cmd_list,
+    'dlq': cmd_dlq,
+    'config': cmd_config,
+}
+
 
 def handle_cli_command(cmd: str) -> str:
     cmd = cmd.strip()
     if not cmd:
         return ''
-    parts = cmd.split()
+    parts = cmd.split(None, 2)
     if parts[0] != 'queuectl':
         raise ValueError('Commands must start with queuectl')
     if len(parts) == 1:
         return 'Nothing to do'
-    action = parts[1]
+    handler = CLI_DISPATCH.get(parts[1])
+    if handler is None:
+        raise ValueError('unknown command')
+    return handler(parts[2] if len(parts) > 2 else '')
 
-    if action == 'enqueue':
-        # rest is JSON
-        payload = cmd[cmd.find('enqueue') + len('enqueue'):].strip()
-        job = json.loads(payload)
-        jid = enqueue_job(job)
-        return f'enqueued {jid}'
 
-    if action == 'worker':
-        if len(parts) < 3:
-            raise ValueError('worker requires start/stop')
-        sub = parts[2]
-        if sub == 'start':
-            # look for --count N
-            cnt = 1
-            if '--count' in parts:
-                idx = parts.index('--count')
-                if idx + 1 < len(parts):
-                    cnt = int(parts[idx+1])
-            for i in range(cnt):
-                ev = threading.Event()
-                w = Worker(stop_event=ev, name=f'worker-{len(st.session_state.workers)+1}')
-                st.session_state.worker_events.append(ev)
-                st.session_state.workers.append(w)
-                w.start()
-            return f'started {cnt} worker(s)'
-        elif sub == 'stop':
-            for ev in st.session_state.worker_events:
-                ev.set()
-            st.session_state.worker_events = []
-            st.session_state.workers = []
-            return 'stop signal sent to workers'
-        else:
-            raise ValueError('unknown worker subcommand')
-
-    if action == 'status':
-        jobs = list_jobs()
-        s = { 'pending':0, 'running':0, 'completed':0 }
-        for j in jobs:
-            s[j['state']] = s.get(j['state'], 0) + 1
-        return json.dumps(s)
-
-    if action == 'list':
-        state = None
-        if '--state' in parts:
-            idx = parts.index('--state')
-            if idx+1 < len(parts):
-                state = parts[idx+1]
-        jobs = list_jobs(state=state)
-        return json.dumps(jobs, indent=2)
-
-    if action == 'dlq':
-        if len(parts) < 3:
-            raise ValueError('dlq requires list/retry')
-        sub = parts[2]
-        if sub == 'list':
-            return json.dumps(list_dlq(), indent=2)
-        if sub == 'retry':
-            if len(parts) < 4:
-                raise ValueError('provide job id')
-            jid = parts[3]
-            retry_dlq(jid)
-            return f'retried {jid}'
-        raise ValueError('unknown dlq subcommand')
-
-    if action == 'config':
-        if len(parts) < 3:
-            raise ValueError('config requires set/get')
-        sub = parts[2]
-        if sub == 'set':
-            if len(parts) < 5:
-                raise ValueError('usage: queuectl config set key value')
-            key = parts[3]
-            value = parts[4]
-            set_config(key, value)
-            return f'set {key} = {value}'
-        if sub == 'get':
-            if len(parts) < 4:
-                raise ValueError('usage: queuectl config get key')
-            key = parts[3]
-            return get_config(key)
 
-    raise ValueError('unknown command')
+JOB_TIMEOUT_SECONDS = 300
+# only the end of stderr is kept as the job's last_error
+ERROR_TAIL_BYTES = 4096
+# how often children without a pidfd are polled for exit
+CHILD_POLL_SECONDS = 0.2
+# anything that needs /bin/sh to interpret it; such commands keep shell=True
+SHELL_CHARS = frozenset('|&;<>()$`\\*?[]{}~#=!%\n')
 
 
+def command_argv(command: str) -> Optional[List[str]]:
+    """argv to exec directly when the command uses no shell features, else None."""
+    if SHELL_CHARS.intersection(command):
+        return None
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return None
+    # builtins (type, cd, trap, ...) and anything else not on PATH go through /bin/sh
+    if not argv or shutil.which(argv[0]) is None:
+        return None
+    return argv
+
+
+@dataclass(slots=True, frozen=True)
+class Job:
+    """A claimed job: only the columns a worker needs to run it and record the outcome."""
+    id: str
+    command: str
+    attempts: int
+    max_retries: int
+
 
 class Worker(threading.Thread):
-    def __init__(self, stop_event: threading.Event, name: str = None):
+    """Supervises up to `concurrency` job subprocesses from a single thread.
+
+    Children are started with Popen and multiplexed through a selector
+    (a pidfd per child on Linux), so in-flight jobs are not tied to Python
+    threads. stderr goes to a temp file rather than an in-memory pipe.
+    """
+
+    def __init__(self, stop_event: threading.Event, name: str = None, concurrency: int = 1):
         super().__init__(daemon=True)
         self.stop_event = stop_event
         self.name = name or f"worker-{str(uuid.uuid4())[:6]}"
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+        self.concurrency = concurrency
+        self._idle_sleep = 0.05
+        # pid -> (job, proc, stderr file, monotonic deadline, pidfd or None)
+        self._running = {}
 
     def run(self):
         print(f"{self.name} started")
-        while not self.stop_event.is_set():
-            job = fetch_next_job()
-            if not job:
-                time.sleep(0.5)
-                continue
-            jid = job['id']
-            # mark running
-            update_job_state(jid, 'running', attempts=job['attempts'])
-            try:
-                # Execute command
-                # Note: using shell=True for simplicity — only run trusted commands
-                start = time.time()
-                proc = subprocess.run(job['command'], shell=True, capture_output=True, text=True, timeout=300)
-                duration = time.time() - start
-                if proc.returncode == 0:
-                    update_job_state(jid, 'completed', attempts=job['attempts'] + 1)
-                else:
-                    raise RuntimeError(f"Exit {proc.returncode}: {proc.stderr.strip()}")
-            except Exception as e:
-                # failed
-                attempts = job['attempts'] + 1
-                maxr = job['max_retries']
-                base_backoff = int(get_config('base_backoff_seconds') or 2)
-                if attempts > maxr:
-                    # move to DLQ
-                    move_to_dlq(jid, last_error=str(e))
-                else:
-                    backoff = base_backoff * (2 ** (attempts - 1))
-                    next_run = (datetime.utcnow() + timedelta(seconds=backoff)).isoformat() + 'Z'
-                    update_job_state(jid, 'pending', attempts=attempts, next_run_at=next_run)
-            # small sleep to avoid tight loop
-            time.sleep(0.01)
+        # pin one reader for the worker's lifetime so its page cache stays hot
+        reader = pool.acquire_reader()
+        try:
+            with selectors.DefaultSelector() as sel:
+                while self._running or not self.stop_event.is_set():
+                    free = self.concurrency - len(self._running)
+                    if free and not self.stop_event.is_set():
+                        jobs = claim_batch(free)
+                        if jobs:
+                            self._idle_sleep = 0.05
+                        for job in jobs:
+                            self._spawn(sel, job)
+                    if not self._running:
+                        # sleep until a job is enqueued/retried or the earliest backoff expires;
+                        # the growing, jittered cap bounds a missed notify and keeps idle
+                        # workers from all re-polling at the same instant
+                        wait_timeout = min(seconds_until_next_run(reader), self._idle_sleep) * random.uniform(0.8, 1.2)
+                        self._idle_sleep = min(self._idle_sleep * 2, 5.0)
+                        with job_available:
+                            job_available.wait(timeout=wait_timeout)
+                        continue
+                    now = time.monotonic()
+                    timeout = max(min(entry[3] for entry in self._running.values()) - now, 0)
+                    if free:
+                        # job_available can't be selected on, so re-check for work while slots are free
+                        timeout = min(timeout, 0.5)
+                    if any(entry[4] is None for entry in self._running.values()):
+                        # children without a pidfd only show up via poll() in _reap
+                        timeout = min(timeout, CHILD_POLL_SECONDS)
+                    if sel.get_map():
+                        sel.select(timeout)
+                    else:
+                        # nothing registered (no pidfd support); select() would just sleep, or raise on Windows
+                        self.stop_event.wait(timeout)
+                    self._reap(sel)
+        finally:
+            pool.release_reader(reader)
         print(f"{self.name} stopped")
 
+    def _spawn(self, sel, job):
+        err = tempfile.TemporaryFile()
+        argv = command_argv(job.command)
+        try:
+            # Note: shell features fall back to shell=True — only run trusted commands
+            proc = subprocess.Popen(argv or job.command, shell=argv is None, stdin=subprocess.DEVNULL,
+                                    stdout=subprocess.DEVNULL, stderr=err)
+        except Exception as e:
+            err.close()
+            self._finish([(job, str(e))])
+            return
+        pidfd = None
+        if hasattr(os, 'pidfd_open'):
+            try:
+                pidfd = os.pidfd_open(proc.pid)
+                sel.register(pidfd, selectors.EVENT_READ)
+            except OSError:
+                pidfd = None
+        self._running[proc.pid] = (job, proc, err, time.monotonic() + JOB_TIMEOUT_SECONDS, pidfd)
+
+    def _reap(self, sel):
+        done = []
+        now = time.monotonic()
+        for pid, (job, proc, err, deadline, pidfd) in list(self._running.items()):
+            if proc.poll() is None:
+                if now < deadline:
+                    continue
+                proc.kill()
+                proc.wait()
+                error = str(subprocess.TimeoutExpired(job.command, JOB_TIMEOUT_SECONDS))
+            elif proc.returncode == 0:
+                error = None
+            else:
+                err.seek(max(err.seek(0, os.SEEK_END) - ERROR_TAIL_BYTES, 0))
+                error = f"Exit {proc.returncode}: {err.read().decode('utf-8', 'replace').strip()}"
+            if pidfd is not None:
+                sel.unregister(pidfd)
+                os.close(pidfd)
+            err.close()
+            del self._running[pid]
+            done.append((job, error))
+        if done:
+            self._finish(done)
+
+    def _finish(self, done):
+        # state transitions for everything reaped together are written in one transaction
+        completed = []
+        retries = []
+        dead = []
+        now = now_iso()
+        for job, error in done:
+            jid = job.id
+            attempts = job.attempts + 1
+            if error is None:
+                completed.append((attempts, now, jid))
+            elif attempts > job.max_retries:
+                # move to DLQ
+                dead.append((now, error, jid))
+            else:
+                base_backoff = get_config_int('base_backoff_seconds', 2)
+                backoff = base_backoff * (2 ** (attempts - 1))
+                retries.append((attempts, now_ms() + backoff * 1000, now, jid))
+        finish_jobs(completed, retries, dead)
+
+
+def claim_batch(k: int = 8) -> List[Job]:
+    # Select and mark running in one statement so two workers can never claim the same job
+    with pool.writer() as c:
+        c.execute("UPDATE jobs SET state = 'running', updated_at = ? WHERE id IN (SELECT id FROM jobs INDEXED BY idx_jobs_pending WHERE state = 'pending' AND (next_run_at_ms IS NULL OR next_run_at_ms <= ?) ORDER BY priority DESC, created_at_ms LIMIT ?) RETURNING id, command, attempts, max_retries", (now_iso(), now_ms(), k))
+        rows = c.fetchall()
+    return [Job(*r) for r in rows]
 
-def fetch_next_job():
-    now = datetime.utcnow().isoformat() + 'Z'
-    with db_lock:
-        c = conn.cursor()
-        c.execute("SELECT id, command, state, attempts, max_retries, created_at, updated_at, next_run_at FROM jobs WHERE state = 'pending' AND (next_run_at IS NULL OR next_run_at <= ?) ORDER BY created_at LIMIT 1", (now,))
-        row = c.fetchone()
-    if not row:
-        return None
-    keys = ['id','command','state','attempts','max_retries','created_at','updated_at','next_run_at']
-    return dict(zip(keys, row))
+
+def finish_jobs(completed, retries, dead):
+    # completed: (attempts, updated_at, id); retries: (attempts, next_run_at_ms, updated_at, id);
+    # dead: (failed_at, last_error, id). Each outcome has its own fixed statement.
+    with pool.writer() as c:
+        c.executemany("UPDATE jobs SET state = 'completed', attempts = ?, next_run_at_ms = NULL, updated_at = ? WHERE id = ?", completed)
+        c.executemany("UPDATE jobs SET state = 'pending', attempts = ?, next_run_at_ms = ?, updated_at = ? WHERE id = ?", retries)
+        c.executemany("INSERT OR REPLACE INTO dlq(id, command, attempts, max_retries, failed_at, last_error, priority) SELECT id, command, attempts, max_retries, ?, ?, priority FROM jobs WHERE id = ?", dead)
+        c.executemany("DELETE FROM jobs WHERE id = ?", [(jid,) for _, _, jid in dead])
+
+
+def seconds_until_next_run(c) -> float:
+    c.execute("SELECT MIN(next_run_at_ms) FROM jobs INDEXED BY idx_jobs_pending_next WHERE state = 'pending'")
+    # fetchall steps the statement to completion so the pinned reader holds no snapshot
+    rows = c.fetchall()
+    next_run_ms = rows[0][0] if rows else None
+    if next_run_ms is None:
+        return 30
+    return max((next_run_ms - now_ms()) / 1000, 0)
 
 # ------------------------ Streamlit App ------------------------
 
@@ -377,9 +738,10 @@ with col1:
     with st.expander('Enqueue a job (form)'):
         jid_input = st.text_input('Job ID (optional)')
         cmd_input = st.text_input('Command (shell) e.g. sleep 2 || echo hi')
-        maxr_input = st.number_input('Max retries', min_value=0, value=int(get_config('max_retries') or 3))
+        maxr_input = st.number_input('Max retries', min_value=0, value=get_config_int('max_retries', 3))
+        prio_input = st.number_input('Priority (higher runs first)', value=0)
         if st.button('Enqueue Form Job'):
-            job = {'id': jid_input or None, 'command': cmd_input, 'max_retries': int(maxr_input)}
+            job = {'id': jid_input or None, 'command': cmd_input, 'max_retries': int(maxr_input), 'priority': int(prio_input)}
             try:
                 jid = enqueue_job(job)
                 st.success(f'Enqueued {jid}')
@@ -403,6 +765,8 @@ with col1:
         if st.button('Stop All Workers'):
             for ev in st.session_state.worker_events:
                 ev.set()
+            with job_available:
+                job_available.notify_all()
             st.session_state.worker_events = []
             st.session_state.workers = []
             st.success('Stop signal sent to workers')
@@ -411,6 +775,8 @@ with col1:
             # convenience: stop then start 1
             for ev in st.session_state.worker_events:
                 ev.set()
+            with job_available:
+                job_available.notify_all()
             st.session_state.worker_events = []
             st.session_state.workers = []
             ev = threading.Event()
@@ -422,8 +788,8 @@ with col1:
 
 with col2:
     st.header('Config')
-    mr = int(get_config('max_retries') or 3)
-    bb = int(get_config('base_backoff_seconds') or 2)
+    mr = get_config_int('max_retries', 3)
+    bb = get_config_int('base_backoff_seconds', 2)
     new_mr = st.number_input('max_retries', min_value=0, value=mr, key='cfg_max_retries')
     new_bb = st.number_input('base_backoff_seconds', min_value=1, value=bb, key='cfg_base_backoff')
     if st.button('Save Config'):
@@ -434,23 +800,56 @@ with col2:
 st.markdown('---')
 
 # Status and listings
+@st.cache_data(ttl=1.0)
+def cached_job_state_counts() -> Dict[str, int]:
+    # every widget click reruns the script; rapid reruns share one count query
+    return job_state_counts()
+
+
+@st.cache_data(ttl=1.0)
+def cached_dlq_count() -> int:
+    return dlq_count()
+
+
 st.header('Status')
 cols = st.columns(4)
-all_jobs = list_jobs()
-counts = {s: 0 for s in ['pending','running','completed','failed']}
-for j in all_jobs:
-    counts[j['state']] = counts.get(j['state'], 0) + 1
+counts = cached_job_state_counts()
 cols[0].metric('Pending', counts.get('pending', 0))
 cols[1].metric('Running', counts.get('running', 0))
 cols[2].metric('Completed', counts.get('completed', 0))
-cols[3].metric('In DLQ', len(list_dlq()))
+cols[3].metric('In DLQ', cached_dlq_count())
+
+def next_page(cursor_key: str, cursor: tuple):
+    st.session_state[cursor_key].append(cursor)
+
+
+def prev_page(cursor_key: str):
+    st.session_state[cursor_key].pop()
+
+
+def reset_pages(cursor_key: str):
+    st.session_state[cursor_key] = []
+
+
+# each *_cursor is a stack of keyset cursors, one per page already paged past
+if 'jobs_cursor' not in st.session_state:
+    st.session_state['jobs_cursor'] = []
+if 'dlq_cursor' not in st.session_state:
+    st.session_state['dlq_cursor'] = []
 
 st.header('Jobs')
-state_filter = st.selectbox('Filter state', options=['all','pending','running','completed'])
-if state_filter == 'all':
-    jobs = list_jobs()
-else:
-    jobs = list_jobs(state=state_filter)
+state_filter = st.selectbox('Filter state', options=['all','pending','running','completed'],
+                            on_change=reset_pages, args=('jobs_cursor',))
+jobs_after = st.session_state['jobs_cursor'][-1] if st.session_state['jobs_cursor'] else None
+# one extra row tells us whether there is a next page
+jobs = list_jobs(state=None if state_filter == 'all' else state_filter, limit=PAGE_SIZE + 1, after=jobs_after)
+jobs_has_next = len(jobs) > PAGE_SIZE
+jobs = jobs[:PAGE_SIZE]
+jnav = st.columns(2)
+jnav[0].button('Previous page', key='jobs-prev', disabled=not st.session_state['jobs_cursor'],
+               on_click=prev_page, args=('jobs_cursor',))
+jnav[1].button('Next page', key='jobs-next', disabled=not jobs_has_next,
+               on_click=next_page, args=('jobs_cursor', (jobs[-1]['created_at_ms'], jobs[-1]['id']) if jobs else None))
 
 for job in jobs:
     with st.expander(f"{job['id']} — {job['state']}"):
@@ -458,18 +857,24 @@ for job in jobs:
         col_a, col_b = st.columns(2)
         if col_a.button('Retry Now', key=f"retry-{job['id']}"):
             # reset attempts and next_run to now
-            update_job_state(job['id'], 'pending', attempts=0, next_run_at=None)
+            retry_job_now(job['id'])
             st.success('Job scheduled for immediate retry')
         if col_b.button('Delete Job', key=f"del-{job['id']}"):
-            with db_lock:
-                c = conn.cursor()
+            with pool.writer() as c:
                 c.execute("DELETE FROM jobs WHERE id = ?", (job['id'],))
-                conn.commit()
             st.warning('Job deleted')
 
 st.markdown('---')
 st.header('Dead Letter Queue (DLQ)')
-dlq = list_dlq()
+dlq_after = st.session_state['dlq_cursor'][-1] if st.session_state['dlq_cursor'] else None
+dlq = list_dlq(limit=PAGE_SIZE + 1, after=dlq_after)
+dlq_has_next = len(dlq) > PAGE_SIZE
+dlq = dlq[:PAGE_SIZE]
+dnav = st.columns(2)
+dnav[0].button('Previous page', key='dlq-prev', disabled=not st.session_state['dlq_cursor'],
+               on_click=prev_page, args=('dlq_cursor',))
+dnav[1].button('Next page', key='dlq-next', disabled=not dlq_has_next,
+               on_click=next_page, args=('dlq_cursor', (dlq[-1]['failed_at'], dlq[-1]['id']) if dlq else None))
 for e in dlq:
     with st.expander(f"{e['id']} (failed at {e['failed_at']})"):
         st.write(e)
@@ -481,17 +886,17 @@ for e in dlq:
             except Exception as ex:
                 st.error(str(ex))
         if c2.button('Purge DLQ Job', key=f"dlq-purge-{e['id']}"):
-            with db_lock:
-                c = conn.cursor()
+            with pool.writer() as c:
                 c.execute("DELETE FROM dlq WHERE id = ?", (e['id'],))
-                conn.commit()
             st.warning('DLQ job purged')
 
 st.markdown('---')
 st.header('Help / Examples')
 st.code('''
 queuectl enqueue {"id":"job1","command":"sleep 2","max_retries":3}
+queuectl enqueue {"id":"urgent","command":"echo now","priority":10}
 queuectl worker start --count 3
+queuectl worker start --count 2 --concurrency 8
 queuectl worker stop
 queuectl status
 queuectl list --state pending